@@ -2,161 +2,429 @@
 import caen_libs.caenhvwrapper as hv
 import sys
 import time
-import datetime
 import sqlite3
+import contextlib
+import functools
+import itertools
+import queue
+import threading
+import concurrent.futures
+import logging
+import logging.handlers
 import yaml       
 import argparse   
 
+logger = logging.getLogger(__name__)
+
+# --- Logging Configuration ---
+LOG_FORMAT = '%(asctime)s %(levelname)-7s %(message)s'
+
 # --- CAEN Parameter Names ---
 PARAM_V_SET = 'V0Set' # Target/Set Voltage
 PARAM_V_MON = 'VMon'  # Measured/Monitor Voltage
 PARAM_I_MON = 'IMon'  # Measured/Monitor Current
 PARAM_I_SET = 'I0Set' # Target/Set Current
+PARAM_STATUS = 'Status' # Channel Status Bitmask
+
+# (Parameters read for every logged channel, in this order)
+CH_PARAMS = (PARAM_V_SET, PARAM_V_MON, PARAM_I_MON, PARAM_I_SET, PARAM_STATUS)
 
 # --- CAEN Status Bit Flags ---
 STATUS_ON      = 1  # (1 << 0) Power ON
 STATUS_OVC     = 8  # (1 << 3) Over Current (Current Trip)
 
+# --- SQL Statements ---
+INSERT_SQL_HEAD = """
+INSERT INTO measurements (
+    timestamp_us, port_id, voltage_set, voltage_mon, current, 
+    current_set, status_raw
+) VALUES """
+INSERT_SQL_ROW = "(?, ?, ?, ?, ?, ?, ?)"
+INSERT_SQL = INSERT_SQL_HEAD + INSERT_SQL_ROW + ";"
+# (Maximum number of rows passed to a single executemany call)
+INSERT_BATCH_SIZE = 500
+# (Maximum number of rows in one multi-row INSERT, keeping the number of
+#  bound values below SQLite's historical SQLITE_MAX_VARIABLE_NUMBER of 999)
+MAX_BULK_INSERT_ROWS = 999 // INSERT_SQL_ROW.count("?")
+
+# --- DB Writer Configuration ---
+WRITER_QUEUE_SIZE = 1000    # Polling cycles buffered between the poller and the DB writer
+WRITER_FLUSH_ROWS = 500     # Flush when this many rows are pending...
+WRITER_FLUSH_SEC  = 5       # ...or when this many seconds passed since the last flush
+
 # --- Failure Configuration ---
 # (Script will exit after this many consecutive connection failures)
 MAX_CONSECUTIVE_FAILURES = 3 
+# (Upper limit of the exponential backoff between reconnection attempts)
+MAX_RECONNECT_DELAY_SEC = 300
+# (Warn when polling overruns the logging interval this many cycles in a row)
+SLOW_CYCLE_WARN_COUNT = 10
+
+#______________________________________________________________________________
+def setup_logging():
+    """
+    Send log records through a queue to a listener thread that writes them
+    out, so that logging from the polling loop is only an enqueue.
+    As before, progress messages go to stdout and warnings/errors to stderr.
+    Returns the started QueueListener; call stop() on exit to flush it.
+    """
+    log_queue = queue.Queue(-1)
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    stdout_handler = logging.StreamHandler(sys.stdout)
+    stdout_handler.setFormatter(formatter)
+    stdout_handler.addFilter(lambda record: record.levelno < logging.WARNING)
+
+    stderr_handler = logging.StreamHandler(sys.stderr)
+    stderr_handler.setFormatter(formatter)
+    stderr_handler.setLevel(logging.WARNING)
+
+    # (respect_handler_level: let each handler apply its own level)
+    listener = logging.handlers.QueueListener(log_queue, stdout_handler, stderr_handler,
+                                              respect_handler_level=True)
+
+    root_logger = logging.getLogger()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.setLevel(logging.INFO)
+
+    listener.start()
+    return listener
+
+#______________________________________________________________________________
+def configure_database(conn):
+    """
+    Tune the SQLite connection for frequent small writes.
+    WAL lets readers (e.g. dashboards) query the database without
+    blocking the logger, and synchronous=NORMAL avoids a second fsync
+    per commit.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
 
 #______________________________________________________________________________
 def create_database_table(conn):
     """
     Create the database table if it does not already exist.
     Uses separate columns for set and monitor voltage.
+    Only the raw status bitmask and the current limit are stored; the
+    ON/trip/out-of-spec flags are derived in the 'measurements_v' view.
+    Timestamps are stored as integer microseconds since the Unix epoch
+    ('timestamp_us'); convert them back with
+    datetime.datetime.fromtimestamp(ts / 1e6, tz=datetime.timezone.utc).
+    'id' is a plain INTEGER PRIMARY KEY (rowid alias) without AUTOINCREMENT,
+    so inserts do not have to update the sqlite_sequence table.
+    Tables created by older versions keep AUTOINCREMENT; SQLite cannot
+    drop it with ALTER TABLE, but it does not affect the stored data.
     """
     
     create_table_sql = """
     CREATE TABLE IF NOT EXISTS measurements (
-        id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
-        timestamp DATETIME,
+        id INTEGER PRIMARY KEY,
+        timestamp_us INTEGER,
         port_id INTEGER,
         voltage_set FLOAT,
         voltage_mon FLOAT,
         current FLOAT,
-        is_hv_on BOOLEAN,
-        status_raw INTEGER,
-        is_overcurrent_protection_active BOOLEAN,
-        is_current_out_of_spec BOOLEAN
+        current_set FLOAT,
+        status_raw INTEGER
     );
     """
+    # Index for the typical "one port over a time range" query
+    create_index_sql = """
+    CREATE INDEX IF NOT EXISTS idx_meas_port_time ON measurements (port_id, timestamp_us);
+    """
+    # Human readable local time, as the former 'timestamp' column
+    timestamp_expr = "strftime('%Y-%m-%dT%H:%M:%f', timestamp_us / 1000000.0, 'unixepoch', 'localtime')"
     try:
-        cursor = conn.cursor()
-        cursor.execute(create_table_sql)
-        conn.commit()
+        with contextlib.closing(conn.cursor()) as cursor:
+            # Create/migrate the schema atomically
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(create_table_sql)
+
+            # Tables created by older versions stored the derived flags instead
+            # of I0Set (the flag columns are left in place, NULL for new rows)
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(measurements)")]
+            if 'current_set' not in columns:
+                cursor.execute("ALTER TABLE measurements ADD COLUMN current_set FLOAT")
+
+            # ...and an ISO 8601 text 'timestamp' instead of 'timestamp_us'
+            # (old rows keep their text timestamp, the view shows either one)
+            if 'timestamp_us' not in columns:
+                cursor.execute("ALTER TABLE measurements ADD COLUMN timestamp_us INTEGER")
+                cursor.execute("DROP INDEX IF EXISTS idx_meas_port_time") # Was on (port_id, timestamp)
+            if 'timestamp' in columns:
+                timestamp_expr = f"COALESCE({timestamp_expr}, timestamp)"
+
+            # Flags derived from the raw status bits; old rows without
+            # 'current_set' fall back to the flag columns stored back then
+            flag_exprs = {
+                'is_hv_on': f"(status_raw & {STATUS_ON}) != 0",
+                'is_overcurrent_protection_active': f"(status_raw & {STATUS_OVC}) != 0",
+                'is_current_out_of_spec': "(current_set > 0 AND current > current_set)",
+            }
+            for name, expr in flag_exprs.items():
+                if name in columns:
+                    flag_exprs[name] = f"COALESCE({expr}, {name})"
+
+            cursor.execute(create_index_sql)
+
+            # View with the flags derived from the raw status bits
+            # (recreated on every start so that it follows the current schema)
+            cursor.execute("DROP VIEW IF EXISTS measurements_v")
+            cursor.execute(f"""
+            CREATE VIEW measurements_v AS
+            SELECT
+                id, timestamp_us, {timestamp_expr} AS timestamp,
+                port_id, voltage_set, voltage_mon, current,
+                current_set, status_raw,
+                {flag_exprs['is_hv_on']} AS is_hv_on,
+                {flag_exprs['is_overcurrent_protection_active']} AS is_overcurrent_protection_active,
+                {flag_exprs['is_current_out_of_spec']} AS is_current_out_of_spec
+            FROM measurements;
+            """)
+            cursor.execute("COMMIT")
     except sqlite3.Error as e:
-        print(f"[DB Error] Failed to create table: {e}", file=sys.stderr)
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        logger.error("[DB Error] Failed to create table: %s", e)
         raise
 
 #______________________________________________________________________________
-def log_hv_status(device, conn, targets):
+def resolve_targets(slots_map, targets):
+    """
+    Validate 'monitoring_targets' from config.yml against the crate map
+    and expand them into a list of (slot, [channels]).
+    Invalid slots/channels are reported and dropped, so this only needs
+    to run once per connection instead of every logging cycle.
+    """
+    resolved = []
+
+    for slot_id, channel_config in targets.items():
+        
+        # Ensure the slot_id from config is valid
+        try:
+            slot_id = int(slot_id) # Ensure key is integer for list indexing
+            board = slots_map[slot_id]
+        except (ValueError, IndexError):
+            logger.warning("Skipping Slot %s: Invalid slot ID or slot out of range.", slot_id)
+            continue
+        except TypeError:
+            logger.warning("Skipping Slot %s: 'monitoring_targets' keys must be integers.", slot_id)
+            continue
+
+        if not board:
+            logger.warning("Skipping Slot %s: Found no board (EMPTY).", slot_id)
+            continue # Skip empty slots
+
+        n_ch = board.n_channel
+        
+        channels_to_log = []
+        if isinstance(channel_config, str) and channel_config.upper() == "ALL":
+            # Config specified "ALL", so log all channels for this board
+            channels_to_log = list(range(n_ch))
+        elif isinstance(channel_config, list):
+            # Config specified a list of channels
+            channels_to_log = channel_config
+        else:
+            logger.warning("Skipping Slot %s: Invalid channel config '%s'.", slot_id, channel_config)
+            continue
+
+        # Drop channels that do not exist on this board
+        valid_channels = []
+        for ch in channels_to_log:
+            if not isinstance(ch, int) or ch < 0:
+                logger.warning("Skipping Slot %s Ch %s: Invalid channel number.", slot_id, ch)
+                continue
+            if ch >= n_ch:
+                logger.warning("Skipping Slot %s Ch %s: Channel number too high for this board (Max: %s).", slot_id, ch, n_ch - 1)
+                continue
+            valid_channels.append(ch)
+
+        if not valid_channels:
+            logger.warning("Skipping Slot %s: No valid channels to log.", slot_id)
+            continue
+
+        resolved.append((board.slot, valid_channels))
+
+    return resolved
+
+#______________________________________________________________________________
+def read_channel_params(device, slot, channels, executor):
+    """
+    Read set/monitor voltage, current, current limit and status for
+    'channels' of one slot. Each parameter is fetched for all channels
+    in a single call, and the calls for the different parameters run
+    concurrently on 'executor' (the CAEN library has no multi-parameter
+    read). If a bulk read fails, fall back to per-channel reads so that
+    one bad channel does not drop the whole slot.
+    Returns the lists (channels, v_sets, v_mons, i_mons, i_sets, statuses),
+    which are empty if no channel of the slot could be read.
+    """
+    if not channels:
+        return [], [], [], [], [], []
+
+    try:
+        futures = [executor.submit(device.get_ch_param, slot, channels, name) for name in CH_PARAMS]
+        concurrent.futures.wait(futures) # Do not fall back while reads are still in flight
+        v_sets, v_mons, i_mons, i_sets, statuses = [f.result() for f in futures]
+        return list(channels), v_sets, v_mons, i_mons, i_sets, statuses
+    except hv.Error as e:
+        logger.warning("Bulk read failed for Slot %s (%s), reading channels one by one.", slot, e)
+
+    results = []
+    for ch in channels:
+        try:
+            # Get all required data from the device (one-element lists)
+            (v_set,), (v_mon,), (i_mon,), (i_set,), (status_raw,) = [
+                device.get_ch_param(slot, [ch], name) for name in CH_PARAMS
+            ]
+        except hv.Error as e:
+            # Skip this channel if a parameter read fails (e.g., 'I0Set' not found)
+            logger.warning("Skipping Slot %s Ch %s: %s", slot, ch, e)
+            continue
+        results.append((ch, v_set, v_mon, i_mon, i_set, status_raw))
+    if not results:
+        return [], [], [], [], [], []
+    return tuple(list(column) for column in zip(*results))
+
+#______________________________________________________________________________
+def log_hv_status(device, row_queue, targets, executor):
     """
     Read status only for the slots/channels specified in 'targets'
-    and insert the data into the database.
+    (as returned by resolve_targets) and hand the rows of this cycle to
+    the DB writer thread through 'row_queue'. 'executor' runs the parameter reads.
+    Returns the number of rows queued; 0 means nothing could be read.
     """
-    print(f"Logging data for specified targets at {datetime.datetime.now()}...")
+    # All rows of one cycle share a single timestamp
+    # (integer microseconds since the Unix epoch)
+    timestamp_us = time.time_ns() // 1000
+    logger.info("Logging data for specified targets...") # (log records carry their own time)
     
+    rows = []
     try:
-        # Get the full crate map to verify board presence
-        slots_map = device.get_crate_map()
-        cursor = conn.cursor()
-        
-        # Iterate through the TARGETS defined in config.yml
-        for slot_id, channel_config in targets.items():
-            
-            # Ensure the slot_id from config is valid
-            try:
-                slot_id = int(slot_id) # Ensure key is integer for list indexing
-                board = slots_map[slot_id]
-            except (ValueError, IndexError):
-                print(f"  Skipping Slot {slot_id}: Invalid slot ID or slot out of range.")
-                continue
-            except TypeError:
-                print(f"  Skipping Slot {slot_id}: 'monitoring_targets' keys must be integers.")
+        # Iterate through the resolved (slot, channels) targets
+        for slot, channels_to_log in targets:
+
+            # Read all parameters of the selected channels with one call per parameter
+            channels, v_sets, v_mons, i_mons, i_sets, statuses = read_channel_params(device, slot, channels_to_log, executor)
+            if not channels:
                 continue
 
-            if not board:
-                print(f"  Skipping Slot {slot_id}: Found no board (EMPTY).")
-                continue # Skip empty slots
-            
-            channels_to_log = []
-            if isinstance(channel_config, str) and channel_config.upper() == "ALL":
-                # Config specified "ALL", so log all channels for this board
-                channels_to_log = list(range(board.n_channel))
-            elif isinstance(channel_config, list):
-                # Config specified a list of channels
-                channels_to_log = channel_config
+            # Prepare data tuples for SQL insertion
+            # (port_id is a unique ID made from slot and channel)
+            rows.extend([
+                (timestamp_us, (slot * 100) + ch, v_set, v_mon, i_mon, i_set, status_raw)
+                for ch, v_set, v_mon, i_mon, i_set, status_raw
+                in zip(channels, v_sets, v_mons, i_mons, i_sets, statuses)
+            ])
+                
+    except hv.Error as e:
+        logger.error("[CAEN HV Error] %s", e)
+    except Exception as e:
+        logger.error("[Error] An error occurred: %s", e)
+
+    # Always hand over the rows that were read successfully
+    if rows:
+        row_queue.put(rows)
+    logger.info("Log complete (%s rows queued).", len(rows))
+    return len(rows)
+
+#______________________________________________________________________________
+@functools.lru_cache(maxsize=16)
+def bulk_insert_sql(n_rows):
+    """
+    Build an INSERT statement with 'n_rows' VALUES groups.
+    The number of rows per polling cycle is normally fixed by the resolved
+    targets, so the same statement is reused (and stays prepared in the
+    connection's statement cache) cycle after cycle.
+    """
+    return INSERT_SQL_HEAD + ", ".join([INSERT_SQL_ROW] * n_rows) + ";"
+
+#______________________________________________________________________________
+def insert_rows(conn, cycles):
+    """
+    Insert the rows of all polling cycles in 'cycles' (one list of rows
+    per cycle) into the measurements table in a single transaction.
+    Each cycle is written with one multi-row INSERT, falling back to
+    executemany when it has more rows than fit in one statement.
+    'conn' must be in autocommit mode (isolation_level=None); the
+    transaction is controlled explicitly here.
+    """
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for rows in cycles:
+            if len(rows) <= MAX_BULK_INSERT_ROWS:
+                conn.execute(bulk_insert_sql(len(rows)), list(itertools.chain.from_iterable(rows)))
             else:
-                print(f"  Skipping Slot {slot_id}: Invalid channel config '{channel_config}'.")
-                continue
+                for i in range(0, len(rows), INSERT_BATCH_SIZE):
+                    conn.executemany(INSERT_SQL, rows[i:i + INSERT_BATCH_SIZE])
+        conn.execute("COMMIT")
+    except sqlite3.Error as e:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK") # Rollback changes on database error
+        n_rows = sum(len(rows) for rows in cycles)
+        logger.error("[DB Error] Failed to insert %s rows: %s", n_rows, e)
 
-            # Log only the specified channels for this slot
-            for ch in channels_to_log:
-                if ch >= board.n_channel:
-                    print(f"  Skipping Slot {slot_id} Ch {ch}: Channel number too high for this board (Max: {board.n_channel - 1}).")
-                    continue
+#______________________________________________________________________________
+def db_writer(row_queue, db_file):
+    """
+    Background thread draining 'row_queue' (one list of rows per polling
+    cycle) into the database.
+    Rows are flushed every WRITER_FLUSH_SEC seconds or WRITER_FLUSH_ROWS
+    rows, whichever comes first, so that slow commits do not delay the
+    next CAEN read. A None item flushes the pending rows and stops the thread.
+    SQLite connections cannot be shared between threads, so the writer
+    opens its own and reuses it for its whole lifetime.
+    """
+    try:
+        # (isolation_level=None: no implicit BEGIN/COMMIT, see insert_rows)
+        conn = sqlite3.connect(db_file, isolation_level=None)
+        configure_database(conn)
+    except sqlite3.Error as e:
+        logger.error("[DB Error] Writer failed to open %s: %s", db_file, e)
+        return
 
-                # Convert datetime to ISO 8601 string to avoid Python 3.12 DeprecationWarning
-                timestamp_str = datetime.datetime.now().isoformat()
-                
-                # Create a unique ID from slot and channel
-                port_id = (board.slot * 100) + ch
-
-                try:
-                    # Get all required data from the device
-                    v_set = device.get_ch_param(board.slot, [ch], PARAM_V_SET)[0]
-                    v_mon = device.get_ch_param(board.slot, [ch], PARAM_V_MON)[0]
-                    i_mon = device.get_ch_param(board.slot, [ch], PARAM_I_MON)[0]
-                    i_set = device.get_ch_param(board.slot, [ch], PARAM_I_SET)[0]
-                    status_raw = device.get_ch_param(board.slot, [ch], 'Status')[0]
-
-                    # Map raw status bits to boolean columns
-                    is_hv_on = (status_raw & STATUS_ON) != 0
-                    is_overcurrent = (status_raw & STATUS_OVC) != 0
-                    
-                    # Check if measured current exceeds the set limit
-                    is_current_out_of_spec = (i_mon > i_set) if i_set > 0 else False
-                    
-                    # Prepare data tuple for SQL insertion
-                    data_tuple = (
-                        timestamp_str,
-                        port_id,
-                        v_set,
-                        v_mon,
-                        i_mon,
-                        is_hv_on,
-                        status_raw,
-                        is_overcurrent,
-                        is_current_out_of_spec
-                    )
-
-                    # Execute the SQL INSERT command
-                    insert_sql = """
-                    INSERT INTO measurements (
-                        timestamp, port_id, voltage_set, voltage_mon, current, 
-                        is_hv_on, status_raw, 
-                        is_overcurrent_protection_active, is_current_out_of_spec
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
-                    """
-                    cursor.execute(insert_sql, data_tuple)
-
-                except hv.Error as e:
-                    # Skip this channel if a parameter read fails (e.g., 'I0Set' not found)
-                    print(f"  Skipping Slot {board.slot} Ch {ch}: {e}")
-                
-        # Commit the transaction after logging all target channels
-        conn.commit()
-        print("  Log complete.")
+    try:
+        cycles = []
+        n_pending = 0
+        stopping = False
+        last_flush = time.monotonic()
+        while not stopping:
+            timeout = max(0, WRITER_FLUSH_SEC - (time.monotonic() - last_flush))
+            try:
+                rows = row_queue.get(timeout=timeout)
+                if rows is None:
+                    stopping = True
+                else:
+                    cycles.append(rows)
+                    n_pending += len(rows)
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            if stopping or n_pending >= WRITER_FLUSH_ROWS or now - last_flush >= WRITER_FLUSH_SEC:
+                if cycles:
+                    insert_rows(conn, cycles)
+                    cycles = []
+                    n_pending = 0
+                last_flush = now
+    finally:
+        logger.info("Closing database connection.")
+        conn.close()
 
+#______________________________________________________________________________
+def close_hv_device(device):
+    """
+    Close the CAEN HV connection, ignoring errors from an already broken link.
+    """
+    try:
+        device.close()
+        logger.info("CAEN HV connection closed.")
     except hv.Error as e:
-        print(f"\n[CAEN HV Error] {e}", file=sys.stderr)
-    except sqlite3.Error as e:
-        print(f"\n[DB Error] {e}", file=sys.stderr)
-        conn.rollback() # Rollback changes on database error
-    except Exception as e:
-        print(f"\n[Error] An error occurred: {e}", file=sys.stderr)
+        logger.error("[CAEN HV Error] Failed to close connection: %s", e)
 
 #______________________________________________________________________________
 def main():
@@ -176,10 +444,10 @@ def main():
         with open(args.config_file, 'r') as f:
             config = yaml.safe_load(f)
     except FileNotFoundError:
-        print(f"[Fatal Error] Config file not found: {args.config_file}", file=sys.stderr)
+        logger.error("[Fatal Error] Config file not found: %s", args.config_file)
         sys.exit(1)
     except yaml.YAMLError as e:
-        print(f"[Fatal Error] Error parsing YAML file {args.config_file}: {e}", file=sys.stderr)
+        logger.error("[Fatal Error] Error parsing YAML file %s: %s", args.config_file, e)
         sys.exit(1)
 
     try:
@@ -195,78 +463,142 @@ def main():
         linktype = caen_cfg['linktype']
 
     except KeyError as e:
-        print(f"[Fatal Error] Config file {args.config_file} is missing key: {e}", file=sys.stderr)
+        logger.error("[Fatal Error] Config file %s is missing key: %s", args.config_file, e)
         sys.exit(1)
 
     if not monitoring_targets:
-        print(f"[Fatal Error] 'monitoring_targets' in {args.config_file} is empty. Nothing to do.", file=sys.stderr)
+        logger.error("[Fatal Error] 'monitoring_targets' in %s is empty. Nothing to do.", args.config_file)
         sys.exit(1)
     
     db_conn = None
+    hv_device = None
+    slots_map = None # Cached crate map of the current connection
+    row_queue = queue.Queue(maxsize=WRITER_QUEUE_SIZE)
+    writer = None
+    param_executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(CH_PARAMS))
     consecutive_failures = 0 # Initialize consecutive failure counter
 
     try:
-        print(f"Connecting to database: {DB_FILE}")
-        db_conn = sqlite3.connect(DB_FILE)
+        logger.info("Connecting to database: %s", DB_FILE)
+        db_conn = sqlite3.connect(DB_FILE, isolation_level=None)
+        configure_database(db_conn)
         create_database_table(db_conn)
+        db_conn.close() # Inserts are done by the writer thread on its own connection
+        db_conn = None
+
+        writer = threading.Thread(target=db_writer, args=(row_queue, DB_FILE), daemon=True)
+        writer.start()
         
-        print(f"Connection successful. Starting logger (Interval: {LOGGING_INTERVAL_SEC}s)...")
-        print(f"Monitoring targets: {monitoring_targets}")
-        print(f"Will exit after {MAX_CONSECUTIVE_FAILURES} consecutive connection failures.")
+        logger.info("Connection successful. Starting logger (Interval: %ss)...", LOGGING_INTERVAL_SEC)
+        logger.info("Monitoring targets: %s", monitoring_targets)
+        logger.info("Will exit after %s consecutive connection failures.", MAX_CONSECUTIVE_FAILURES)
         
+        next_deadline = time.monotonic() # Start time of the current cycle
+        slow_cycles = 0 # Consecutive cycles that overran the interval
         while True:
-            hv_device = None
+            if not writer.is_alive():
+                logger.error("[Fatal Error] Database writer thread stopped. Exiting script.")
+                break
+
+            # Set when the connection looks broken: it is then closed and re-opened
+            connection_error = None
             try:
-                # 1. Connect to CAEN HV (INSIDE the loop)
-                print(f"Connecting to CAEN HV at {host}...")
-                hv_device = hv.Device.open(hv.SystemType[systype], hv.LinkType[linktype],
-                                          host, 'admin', 'admin')
-                
-                # --- Connection Succeeded ---
-                consecutive_failures = 0 # Reset failure counter
+                # 1. Connect to CAEN HV (only if there is no open connection)
+                if hv_device is None:
+                    logger.info("Connecting to CAEN HV at %s...", host)
+                    hv_device = hv.Device.open(hv.SystemType[systype], hv.LinkType[linktype],
+                                              host, 'admin', 'admin')
+
+                # The crate topology does not change between polls, so the
+                # crate map is only (re)read after connecting or an error
+                if slots_map is None:
+                    slots_map = hv_device.get_crate_map()
+
+                    # Validate the targets against the cached crate map
+                    resolved_targets = resolve_targets(slots_map, monitoring_targets)
+                    logger.info("Resolved targets: %s", resolved_targets)
+
+                if not resolved_targets:
+                    # The crate map can briefly show empty slots (e.g. right after
+                    # a crate power cycle), so retry instead of exiting
+                    connection_error = "No valid targets found in the crate map"
                 
                 # 2. Pass targets to the logging function
-                log_hv_status(hv_device, db_conn, monitoring_targets) 
+                # (single channel/parameter read errors are handled inside and do
+                #  not count as failures, but a cycle that reads nothing does)
+                elif log_hv_status(hv_device, row_queue, resolved_targets, param_executor) == 0:
+                    connection_error = "No channel could be read in this cycle"
             
             except hv.Error as e:
+                connection_error = e
+            except KeyboardInterrupt:
+                logger.info("Stopping logger.")
+                break # Exit the while loop
+            except Exception as e:
+                logger.error("[Fatal Error] %s", e)
+                break # Exit on other fatal errors
+
+            if connection_error is None:
+                # --- Cycle Succeeded ---
+                consecutive_failures = 0 # Reset failure counter
+            else:
                 # --- Connection Failed ---
                 consecutive_failures += 1
-                print(f"[CAEN HV Error] Failed to connect or log: {e}", file=sys.stderr)
-                print(f"Consecutive failures: {consecutive_failures}/{MAX_CONSECUTIVE_FAILURES}", file=sys.stderr)
+                logger.error("[CAEN HV Error] Failed to connect or log: %s", connection_error)
+                logger.error("Consecutive failures: %s/%s", consecutive_failures, MAX_CONSECUTIVE_FAILURES)
+
+                # Drop the connection and crate map so that both are refreshed on the next cycle
+                slots_map = None
+                if hv_device:
+                    close_hv_device(hv_device)
+                    hv_device = None
                 
                 # Check if failure limit is reached
                 if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
-                    print(f"Reached maximum retry limit ({MAX_CONSECUTIVE_FAILURES}). Exiting script.", file=sys.stderr)
+                    logger.error("Reached maximum retry limit (%s). Exiting script.", MAX_CONSECUTIVE_FAILURES)
                     break # Exit the while loop, which will end the script
-
-            except KeyboardInterrupt:
-                print("\nStopping logger.")
-                break # Exit the while loop
-            except Exception as e:
-                print(f"\n[Fatal Error] {e}", file=sys.stderr)
-                break # Exit on other fatal errors
-            finally:
-                # 3. Disconnect from CAEN HV (INSIDE the loop)
-                if hv_device:
-                    hv_device.close()
-                    print("CAEN HV connection closed.")
             
-            # 4. Wait for the next interval
-            print(f"Sleeping for {LOGGING_INTERVAL_SEC} seconds...")
+            # 3. Wait for the next interval (back off exponentially while reconnecting)
+            if hv_device is None:
+                sleep_sec = min(LOGGING_INTERVAL_SEC * 2 ** (consecutive_failures - 1),
+                                MAX_RECONNECT_DELAY_SEC)
+                next_deadline = time.monotonic() + sleep_sec
+            else:
+                # Sleep until the next deadline so that polling time does not add up
+                next_deadline += LOGGING_INTERVAL_SEC
+                sleep_sec = max(0, next_deadline - time.monotonic())
+                if sleep_sec == 0:
+                    # Overran the interval: restart the schedule from now instead of catching up
+                    next_deadline = time.monotonic()
+                    slow_cycles += 1
+                    if slow_cycles % SLOW_CYCLE_WARN_COUNT == 0:
+                        logger.warning("Polling took longer than %ss for %s consecutive cycles.", LOGGING_INTERVAL_SEC, slow_cycles)
+                else:
+                    slow_cycles = 0
+            logger.info("Sleeping for %.2f seconds...", sleep_sec)
             try:
-                time.sleep(LOGGING_INTERVAL_SEC)
+                time.sleep(sleep_sec)
             except KeyboardInterrupt:
-                print("\nStopping logger.")
+                logger.info("Stopping logger.")
                 break # Exit the while loop
 
     except Exception as e:
-        print(f"\n[Fatal Error during setup] {e}", file=sys.stderr)
+        logger.error("[Fatal Error during setup] %s", e)
     finally:
-        # Clean up database connection on exit
+        # Disconnect from CAEN HV, flush pending rows and clean up database connection on exit
+        param_executor.shutdown()
+        if hv_device:
+            close_hv_device(hv_device)
+        if writer and writer.is_alive():
+            row_queue.put(None)
+            writer.join()
         if db_conn:
-            print("Closing database connection.")
             db_conn.close()
 
 #______________________________________________________________________________
 if __name__ == '__main__':
-  main()
+  log_listener = setup_logging()
+  try:
+    main()
+  finally:
+    log_listener.stop()